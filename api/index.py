@@ -1,14 +1,55 @@
 from flask import Flask, request, jsonify
-from openai import OpenAI
+from flask.json.provider import JSONProvider
+from openai import OpenAI, DefaultHttpxClient
 from pydantic import BaseModel, Field
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, reduce
 from typing import List, Literal
+import asyncio
 import json
+import logging
+import operator
+import orjson
+import os
+
+# Makes jsonify and request.get_json use orjson, which is faster than the stdlib json module.
+# Extra dump arguments (sort_keys, compact, indent, ...) are not supported and are silently ignored.
+class OrjsonProvider(JSONProvider):
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Same rules as jsonify: one argument is serialized as-is, several become a list, keyword arguments a dict
+        if args and kwargs:
+            raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+        obj = args[0] if len(args) == 1 else (list(args) if args else kwargs or None)
+        # orjson already gives us bytes, so hand them straight to the response without a str round trip
+        return self._app.response_class(orjson.dumps(obj), mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+logger = logging.getLogger(__name__)
 
 # Initialize OpenAI client (requires OPENAI_API_KEY environment variable)
-client = OpenAI()
-
+# Built once so its connection pool (and SSL setup) is reused by every request. HTTP/2 lets concurrent calls share one
+# connection, so the TCP/TLS handshake only happens when the pool is cold.
+# Flask's async views get a new event loop per request and an async client can't outlive its loop, so this is the
+# sync client, and the per-user calls run on a shared thread pool instead.
+client = OpenAI(http_client=DefaultHttpxClient(http2=True))
+
+# The pool is shared by every /schedule request this instance is serving, so this is the most model calls in flight at
+# once across all of them. Calls beyond it queue, and then a request takes longer than its single slowest call.
+# Each worker is a thread that mostly waits on the network, so this can go well above the CPU count; set
+# OPENAI_MAX_PARALLEL_CALLS to match the group sizes you expect.
+MAX_PARALLEL_CALLS = int(os.environ.get('OPENAI_MAX_PARALLEL_CALLS', '16'))
+_model_call_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS, thread_name_prefix='openai')
+
+# These models describe the JSON the model has to return. They are only used to build the response schema below.
 class TimeSlot(BaseModel):
     day: Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
     # ge means greater than or equal, le means less than or equal
@@ -18,9 +59,33 @@ class UserInput(BaseModel):
     available_slots: List[TimeSlot]
     preferred_slots: List[TimeSlot]
 
-# This function takes a user's message and returns a UserInput object, which contains the available and preferred slots.
-def get_user_data(user_text: str):
-    system_prompt = """
+# Every possible slot (5 days x 8 hours = 40) gets its own bit: bit = day_index * 8 + (hour - 9).
+# A user's slots then fit in a single int, and intersecting users is just a bitwise AND.
+# Day names are turned into their index once, when parsing; everything after that only deals with ints
+# and the names come back (from _DAY_NAMES) only in the final response.
+_DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+_DAY_IDX = {day: i for i, day in enumerate(_DAY_NAMES)}
+_SLOT_COUNT = len(_DAY_NAMES) * 8
+
+_HOURS = range(9, 17)
+
+# A hand-rolled version of the TimeSlot checks (known day, whole hour from 9 to 16).
+# The model's output is already held to the schema, so this is a cheap sanity check instead of a full Pydantic validation.
+# The raw slots go straight into a bitmask, without ever creating TimeSlot objects.
+def parse_slots_mask(raw_slots: list) -> int:
+    mask = 0
+    for raw in raw_slots:
+        day_idx, hour = _DAY_IDX.get(raw['day']), raw['hour']
+        if day_idx is None or type(hour) is not int or hour not in _HOURS:
+            raise ValueError(f"Invalid time slot from model: {raw}")
+        mask |= 1 << (day_idx * 8 + hour - 9)
+    return mask
+
+# Building the JSON schema walks the whole model, so we do it once here instead of on every request.
+_USER_INPUT_SCHEMA = UserInput.model_json_schema()
+
+# The system prompt never changes between users, so it (and its message dict) is created once when the module loads.
+SYSTEM_PROMPT = """
     You are a scheduling assistant. Standard Work Hours: 09:00 to 17:00 (5 PM).
     
     RULES FOR GENERATING SLOTS:
@@ -29,118 +94,123 @@ def get_user_data(user_text: str):
     3. Negative Constraints: If a user says "Busy Friday", you MUST list ALL available hours for Monday, Tuesday, Wednesday, and Thursday, plus the free hours on Friday.
     4. IMPLIED AVAILABILITY: Unless a user explicitly excludes a day, assume they are available 09:00-17:00.
     """
+_SYSTEM_MSG = {'role': 'system', 'content': SYSTEM_PROMPT}
+
+# The output is a tiny, schema-constrained JSON object, so a small model is enough and answers much faster.
+# Set OPENAI_MODEL to use a different one.
+MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4.1-nano')
 
+# This function takes a user's message and returns its (available, preferred) slots as a pair of bitmasks.
+# Identical messages always parse to the same slots (temperature is 0), so recent results are kept in memory
+# and a repeated message skips the model call entirely.
+@lru_cache(maxsize=1024)
+def get_user_data(user_text: str):
     response = client.chat.completions.create(
-        model='gpt-4o-mini',
+        model=MODEL,
         messages=[
-            {'role': 'system', 'content': system_prompt},
+            _SYSTEM_MSG,
             {'role': 'user', 'content': user_text}
         ],
         response_format={
             "type": "json_schema",
             "json_schema": {
                 "name": "user_input_schema",
-                "schema": UserInput.model_json_schema(),
+                "schema": _USER_INPUT_SCHEMA,
                 "strict": True
             }
         },
         temperature=0  # Set temp to 0 to make it more logical/strict
     )
 
-    return UserInput.model_validate_json(response.choices[0].message.content)
-
-# This function finds the minimum common slots between users, and also a preferred schedule, through concept of set intersection.
-def find_best_times(users_data: list[UserInput]):
-    if not users_data: return []
-
-    # Initializing the first user before schedule intersection
-    first_user = users_data[0]
-    # print(f"First User: {first_user}")
-    common_slots = set()
-    for slot in first_user.available_slots:
-        common_slots.add((slot.day, slot.hour))
-
-    # Intersecting with remaining users
-    remaining_users = users_data[1:]
-    for i, user in enumerate(remaining_users):
-        current_user_slots = set()
-        for slot in user.available_slots:
-            current_user_slots.add((slot.day, slot.hour))
-        
-        # Debugging: See why intersection might fail
-        # print(f"Intersecting with User {i+2}")
-        
-        # The Math
-        common_slots = common_slots.intersection(current_user_slots)
-        
-        if len(common_slots) == 0:
-            # print(f"User {i+2} has no matching times with the group.")
-            return []
+    data = orjson.loads(response.choices[0].message.content)
+    return parse_slots_mask(data['available_slots']), parse_slots_mask(data['preferred_slots'])
+
+# The core of the scheduler, working only on ints: intersects the users' availability masks and scores each common slot
+# by how many users prefer it. Returns (-score, slot_index) pairs, best first.
+def rank_slots(avail_masks: list[int], pref_masks: list[int]) -> list[tuple[int, int]]:
+    # The Math: a slot is common only if its bit is set for every user
+    common_mask = reduce(operator.and_, avail_masks)
+    if not common_mask:
+        return []
+
+    # Score is initialized to 0, and added 1 for each user who has a preference for that slot.
+    # Each user only walks the bits of their preferences that are also common, instead of every common slot checking every user.
+    scores = [0] * _SLOT_COUNT
+    for prefs in pref_masks:
+        wanted = prefs & common_mask
+        while wanted:
+            # Take the lowest set bit, then clear it from the mask
+            bit = wanted & -wanted
+            wanted ^= bit
+            scores[bit.bit_length() - 1] += 1
 
-    # Now considering the preferences among common time slots
     ranked_slots = []
-    # print(f"Common Slots: {common_slots} before preferences are chosen")
-    # This multi-nested for loop basically just looks for preferences in the common slots among users. Most preferred slots get highest score.
-    # Score is initialized to 0, and added 1 for each user who has a preference for that slot. The score is then used to sort the slots.
-    for day, hour in common_slots:
-        current_score = 0
-        for user in users_data:
-            found_preference = False
-            for pref in user.preferred_slots:
-                if pref.day == day and pref.hour == hour:
-                    found_preference = True
-                    break 
-            if found_preference:
-                current_score += 1
-        
-        ranked_slots.append({'day': day, 'hour': hour, 'score': current_score})
+    while common_mask:
+        bit = common_mask & -common_mask
+        common_mask ^= bit
+        slot_idx = bit.bit_length() - 1
+        ranked_slots.append((-scores[slot_idx], slot_idx))
 
-    
-    day_mapping = {
-        "Monday": 1, "Tuesday": 2, "Wednesday": 3, "Thursday": 4, "Friday": 5
-    }
-
-    # We create a specific function just to handle the sorting logic.
-    # Python will run this function on every single slot in the list 
-    # to decide which one should go first.
     # The assumption is that, an earlier schedule in terms of day, hour, and score is better.
-    def get_sorting_priorities(slot):
-        
-        # Python always sorts from SMALLEST number to LARGEST number (Ascending).
-        # But we want the HIGHEST score first (Descending).
-        # TRICK: We multiply by -1.
-        #   Real Score: 5 (Best)  -> Sorting Value: -5  (Smallest number, comes first)
-        #   Real Score: 0 (Worst) -> Sorting Value: 0   (Largest number, comes last)
-        # print(f"Whole slot: {slot}")
-        sort_by_score = slot['score'] * -1
-        # print(f"Sort by score: {sort_by_score}")
-
-        # If scores are tied, we look at this next.
-        # Example: Monday (1) is smaller than Tuesday (2), so Monday comes first.
-        sort_by_day = day_mapping[slot['day']]
-        # print(f"Sort by day: {sort_by_day}")
-        
-        # If Day and Score are tied, we look at this last.
-        # Example: 9am (9) is smaller than 10am (10), so 9am comes first.
-        sort_by_hour = slot['hour']
-        # print(f"Sort by hour: {sort_by_hour}")
-        
-        # We return a "tuple" of these three numbers.
-        # Python compares the first number... if tied, compares the second... etc.
-        return (sort_by_score, sort_by_day, sort_by_hour)
-
-    # Run the sort using our custom logic function
-    final_sorted_list = sorted(ranked_slots, key=get_sorting_priorities)
-    # print(f"Final sorted list: {final_sorted_list}")
-    
-    return final_sorted_list
+    # Python compares the tuples element by element:
+    #   1. Score, multiplied by -1 so the HIGHEST score sorts first (Python sorts ascending).
+    #   2. If scores are tied, the slot index. It is day_index * 8 + (hour - 9), so it already orders
+    #      by day first (Monday before Tuesday) and then by hour (9am before 10am).
+    # No key function needed, so the sort never calls back into Python per slot.
+    ranked_slots.sort()
+    return ranked_slots
+
+# This function finds the minimum common slots between users, and also a preferred schedule, through concept of set intersection (done with bitmasks).
+# Takes each user's availability and preference bitmasks (see parse_slots_mask) and returns the ranked slots for the response.
+def find_best_times(avail_masks: list[int], pref_masks: list[int]):
+    if not avail_masks: return []
+
+    # Only decode back to a day name and hour for the response
+    results = []
+    for neg_score, slot_idx in rank_slots(avail_masks, pref_masks):
+        day_idx, hour_offset = divmod(slot_idx, 8)
+        results.append({'day': _DAY_NAMES[day_idx], 'hour': hour_offset + 9, 'score': -neg_score})
+    return results
+
+# Runs find_best_times starting from the raw messages.
+# Every user's message is sent to the model at the same time, and each answer is folded into the common mask as soon as
+# it arrives instead of waiting for the slowest one. If the common mask ever hits 0 there can't be a meeting time,
+# so we stop waiting on the calls still in flight and return right away.
+async def find_best_times_for_messages(msgs: list[str]):
+    if not msgs: return []
+
+    loop = asyncio.get_running_loop()
+    calls = [loop.run_in_executor(_model_call_pool, get_user_data, m) for m in msgs]
+    try:
+        common_mask = None
+        # Scores are plain counts, so the order users finish in doesn't matter
+        pref_masks = []
+        for next_user in asyncio.as_completed(calls):
+            avail_mask, pref_mask = await next_user
+            common_mask = avail_mask if common_mask is None else common_mask & avail_mask
+            if not common_mask:
+                return []
+            pref_masks.append(pref_mask)
+    finally:
+        # Drop any calls we no longer need. Ones still queued never start; ones already running finish in the
+        # background (their result still lands in the cache), we just stop waiting for them.
+        for call in calls:
+            call.cancel()
+        # Collect what's left (every call is now finished or cancelled, so this doesn't wait) so that a second
+        # failure which landed at the same time isn't reported as "exception was never retrieved".
+        await asyncio.gather(*calls, return_exceptions=True)
+
+    # common_mask is already the intersection of everyone's availability
+    return find_best_times([common_mask], pref_masks)
 
 @app.route('/')
 def home():
     return 'Scheduling API is running.'
 
+# An async view (needs Flask[async]) so the handler can await each user's model call as it finishes.
+# Concurrency across requests comes from Vercel running more instances of the function, not from this.
 @app.route('/schedule', methods=['POST'])
-def schedule():
+async def schedule():
     try:
         data = request.get_json()
         if not data or 'messages' not in data:
@@ -150,17 +220,11 @@ def schedule():
         if not isinstance(msgs, list):
              return jsonify({'error': '"messages" must be a list of strings'}), 400
 
-        users_data = []
-        for i, m in enumerate(msgs):
-            # print(f"Processing User {i+1}...")
-            user_data = get_user_data(m)
-            users_data.append(user_data)
-        
-        results = find_best_times(users_data)
+        results = await find_best_times_for_messages(msgs)
         return jsonify({'recommended_times': results}), 200
 
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("Error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+import os
+import random
+import sys
+
+import pytest
+
+# index.py builds its OpenAI client at import; no request is ever sent in these tests.
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from index import find_best_times, parse_slots_mask
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+ALL_SLOTS = [(day, hour) for day in DAYS for hour in range(9, 17)]
+
+
+# The original set-intersection version of find_best_times, kept as the reference behaviour.
+def reference_best_times(users):
+    if not users: return []
+    common_slots = set(users[0]['available'])
+    for user in users[1:]:
+        common_slots &= set(user['available'])
+    ranked_slots = []
+    for day, hour in common_slots:
+        score = sum(1 for user in users if (day, hour) in user['preferred'])
+        ranked_slots.append({'day': day, 'hour': hour, 'score': score})
+    return sorted(ranked_slots, key=lambda slot: (-slot['score'], DAYS.index(slot['day']), slot['hour']))
+
+
+def best_times(users):
+    def mask(slots):
+        return parse_slots_mask([{'day': day, 'hour': hour} for day, hour in slots])
+    return find_best_times([mask(user['available']) for user in users], [mask(user['preferred']) for user in users])
+
+
+def check(users):
+    assert best_times(users) == reference_best_times(users)
+
+
+def test_no_users():
+    assert best_times([]) == []
+
+
+def test_single_user():
+    check([{'available': [('Friday', 16), ('Monday', 9), ('Monday', 10)], 'preferred': [('Monday', 10)]}])
+
+
+def test_no_common_slot():
+    check([
+        {'available': [('Monday', 9)], 'preferred': []},
+        {'available': [('Monday', 10)], 'preferred': []},
+    ])
+    check([
+        {'available': ALL_SLOTS, 'preferred': []},
+        {'available': [], 'preferred': [('Monday', 9)]},
+    ])
+
+
+def test_ties_order_by_day_then_hour():
+    users = [
+        {'available': ALL_SLOTS, 'preferred': [('Friday', 9), ('Tuesday', 15)]},
+        {'available': ALL_SLOTS, 'preferred': [('Tuesday', 11), ('Monday', 16)]},
+    ]
+    check(users)
+    assert [(slot['day'], slot['hour']) for slot in best_times(users)[:4]] == [
+        ('Monday', 16), ('Tuesday', 11), ('Tuesday', 15), ('Friday', 9)
+    ]
+
+
+def test_empty_preferences():
+    check([{'available': ALL_SLOTS, 'preferred': []}, {'available': ALL_SLOTS[10:], 'preferred': []}])
+
+
+def test_duplicate_slots_count_once():
+    users = [
+        {'available': [('Monday', 9), ('Monday', 9), ('Tuesday', 9)], 'preferred': [('Tuesday', 9), ('Tuesday', 9)]},
+        {'available': [('Tuesday', 9), ('Monday', 9)], 'preferred': [('Tuesday', 9)]},
+    ]
+    check(users)
+    assert best_times(users)[0] == {'day': 'Tuesday', 'hour': 9, 'score': 2}
+
+
+def test_preferences_outside_common_slots_are_ignored():
+    check([
+        {'available': [('Monday', 9), ('Monday', 10)], 'preferred': [('Friday', 16)]},
+        {'available': [('Monday', 10)], 'preferred': [('Friday', 16), ('Monday', 9)]},
+    ])
+
+
+def test_parse_slots_mask_sets_one_bit_per_slot():
+    raw = [{'day': 'Monday', 'hour': 9}, {'day': 'Tuesday', 'hour': 10}, {'day': 'Friday', 'hour': 16}]
+    assert parse_slots_mask(raw) == (1 << 0) | (1 << 9) | (1 << 39)
+    assert parse_slots_mask([]) == 0
+
+
+@pytest.mark.parametrize('raw', [
+    {'day': 'Sunday', 'hour': 9},
+    {'day': 'Monday', 'hour': 8},
+    {'day': 'Monday', 'hour': 17},
+    {'day': 'Monday', 'hour': True},
+    {'day': 'Monday', 'hour': 10.0},
+])
+def test_parse_slots_mask_rejects_invalid_slots(raw):
+    with pytest.raises(ValueError):
+        parse_slots_mask([{'day': 'Monday', 'hour': 9}, raw])
+
+
+def test_matches_reference_on_random_schedules():
+    rng = random.Random(0)
+    for _ in range(500):
+        users = [
+            {
+                # Mostly-free users so the groups usually share some slots, plus a few repeats
+                'available': rng.sample(ALL_SLOTS, k=rng.randint(25, 40)) + rng.choices(ALL_SLOTS, k=3),
+                'preferred': rng.choices(ALL_SLOTS, k=rng.randint(0, 12)),
+            }
+            for _ in range(rng.randint(1, 6))
+        ]
+        check(users)
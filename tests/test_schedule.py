@@ -0,0 +1,146 @@
+import asyncio
+import gc
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+# index.py builds its OpenAI client at import; every model call in these tests is stubbed out.
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+import index
+
+
+def slots(*pairs):
+    return [{'day': day, 'hour': hour} for day, hour in pairs]
+
+
+# Stands in for the OpenAI API. Tests map a user message to the JSON the model should return,
+# or to a function that is called first (to sleep or raise) and returns that JSON.
+@pytest.fixture
+def model(monkeypatch):
+    replies = {}
+    calls = []
+
+    def create(**kwargs):
+        user_text = kwargs['messages'][-1]['content']
+        calls.append(user_text)
+        reply = replies[user_text]
+        if callable(reply):
+            reply = reply()
+        message = SimpleNamespace(content=orjson.dumps(reply).decode())
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(index.client.chat.completions, 'create', create)
+    index.get_user_data.cache_clear()
+    yield SimpleNamespace(replies=replies, calls=calls)
+    index.get_user_data.cache_clear()
+
+
+def test_repeated_message_skips_the_model_call(model):
+    model.replies['free monday 9'] = {'available_slots': slots(('Monday', 9)), 'preferred_slots': []}
+
+    first = index.get_user_data('free monday 9')
+    second = index.get_user_data('free monday 9')
+
+    assert first == second == (1, 0)
+    assert model.calls == ['free monday 9']
+
+
+def test_json_responses_are_serialized_with_orjson():
+    response = index.app.test_client().post('/schedule', json={})
+
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+    assert response.data == orjson.dumps({'error': 'Missing "messages" list in request body'})
+
+
+def test_schedule_parses_request_json_and_ranks_slots(model):
+    model.replies['a'] = {'available_slots': slots(('Monday', 9), ('Monday', 10)), 'preferred_slots': slots(('Monday', 10))}
+    model.replies['b'] = {'available_slots': slots(('Monday', 10), ('Monday', 9)), 'preferred_slots': []}
+
+    response = index.app.test_client().post('/schedule', data=orjson.dumps({'messages': ['a', 'b']}), content_type='application/json')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.data == orjson.dumps({'recommended_times': [
+        {'day': 'Monday', 'hour': 10, 'score': 1},
+        {'day': 'Monday', 'hour': 9, 'score': 0},
+    ]})
+
+
+def test_jsonify_argument_forms():
+    with index.app.app_context():
+        assert index.jsonify().data == b'null'
+        assert index.jsonify([1, 2]).data == b'[1,2]'
+        assert index.jsonify(1, 2).data == b'[1,2]'
+        assert index.jsonify(a=1).data == b'{"a":1}'
+        with pytest.raises(TypeError):
+            index.jsonify(1, a=1)
+
+
+def run_messages(msgs):
+    return asyncio.run(index.find_best_times_for_messages(msgs))
+
+
+def test_messages_return_early_without_waiting_for_slow_calls(model):
+    release_slow = threading.Event()
+
+    def slow():
+        release_slow.wait(5)
+        return {'available_slots': slots(('Monday', 9)), 'preferred_slots': []}
+
+    model.replies['a'] = {'available_slots': slots(('Monday', 9)), 'preferred_slots': []}
+    model.replies['none'] = {'available_slots': [], 'preferred_slots': []}
+    model.replies['slow'] = slow
+    try:
+        assert run_messages(['a', 'none', 'slow']) == []
+        # The slow call is still blocked, so the result did not wait for it
+        assert not release_slow.is_set()
+    finally:
+        release_slow.set()
+
+
+def test_messages_surface_model_errors_without_leaking_others(model, caplog):
+    release_slow = threading.Event()
+
+    def fail(message):
+        def reply():
+            raise RuntimeError(message)
+        return reply
+
+    def slow():
+        release_slow.wait(5)
+        return {'available_slots': slots(('Monday', 9)), 'preferred_slots': []}
+
+    model.replies['bad'] = fail('bad')
+    model.replies['also bad'] = fail('also bad')
+    model.replies['slow'] = slow
+    try:
+        with pytest.raises(RuntimeError, match='bad'):
+            run_messages(['bad', 'also bad', 'slow'])
+        assert not release_slow.is_set()
+    finally:
+        release_slow.set()
+
+    gc.collect()
+    assert not [record for record in caplog.records if 'never retrieved' in record.getMessage()]
+
+
+def test_messages_match_find_best_times_on_all_masks(model):
+    users = {
+        'a': {'available_slots': slots(('Monday', 9), ('Monday', 10), ('Tuesday', 11), ('Friday', 16)), 'preferred_slots': slots(('Friday', 16))},
+        'b': {'available_slots': slots(('Friday', 16), ('Tuesday', 11), ('Monday', 10)), 'preferred_slots': slots(('Tuesday', 11), ('Friday', 16))},
+        'c': {'available_slots': slots(('Tuesday', 11), ('Monday', 10), ('Friday', 16)), 'preferred_slots': slots(('Monday', 10), ('Monday', 9))},
+    }
+    model.replies.update(users)
+
+    avail_masks = [index.parse_slots_mask(user['available_slots']) for user in users.values()]
+    pref_masks = [index.parse_slots_mask(user['preferred_slots']) for user in users.values()]
+
+    assert run_messages(list(users)) == index.find_best_times(avail_masks, pref_masks)
+    assert run_messages([]) == []